@@ -6,14 +6,25 @@ Executes agent tasks using the Anthropic API
 import os
 import sys
 import json
-import yaml
+import asyncio
 import argparse
+import atexit
+import functools
+import hashlib
+import io
 import logging
+import random
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-import anthropic
-from anthropic import Anthropic
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple, Union
+import orjson
+
+# anthropic (with httpx/pydantic), yaml and msgpack are imported where they are
+# used so that --help and importing this module stay fast
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
 
 # Configure logging
 logging.basicConfig(
@@ -22,22 +33,401 @@ logging.basicConfig(
 )
 logger = logging.getLogger('claude_agent')
 
+# Manifests of submitted Message Batches, relative to .claude/
+BATCHES_DIR = 'batches'
+BATCH_POLL_INTERVAL = 30
+
+# Precompiled agent specs written by compile_specs.py, relative to .claude/
+SPECS_BUNDLE = 'agents/specs.msgpack'
+
+# Result fields kept in memory when execute_many streams results to JSONL
+SUMMARY_FIELDS = ('agent_id', 'timestamp', 'duration_seconds', 'success', 'error')
+
+DEFAULT_MODEL = "claude-haiku-4-5"
+DEFAULT_MAX_TOKENS = 1024
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Retry policy: connection errors, 5xx (including 529 overloaded) and these
+# status codes are retried, as are errors of these types. Overload errors sent
+# inside a stream arrive with the stream's 200 status, so the type is checked too.
+MAX_RETRIES = 5
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+# Statuses (besides 5xx) that count towards opening the circuit breaker
+PROVIDER_FAILURE_STATUS_CODES = {408, 429}
+RETRYABLE_ERROR_TYPES = {'rate_limit_error', 'overloaded_error'}
+
+SYSTEM_PROMPT = (
+    "You are a specialized agent in the GIS Platform development workflow. "
+    "Analyze the provided context and execute the requested task according to your specifications."
+)
+
+
+def min_cacheable_tokens(model: str) -> int:
+    """Return the minimum prompt prefix length Anthropic will cache for a model
+    
+    Haiku models need 2048 tokens (4096 for Haiku 4.5); Sonnet and Opus need
+    1024 (4096 for Opus 4.5). Unknown models get the conservative 4096.
+    """
+    if 'opus-4-5' in model:
+        return 4096
+    if 'haiku' in model:
+        return 2048 if '-3' in model else 4096
+    if 'sonnet' in model or 'opus' in model:
+        return 1024
+    return 4096
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str, loop: asyncio.AbstractEventLoop) -> 'AsyncAnthropic':
+    """Return a shared client per API key and event loop
+    
+    Keep-alive connections are reused across calls, but they are bound to the
+    loop that opened them, so each loop gets its own pool.
+    """
+    import anthropic
+    
+    return anthropic.AsyncAnthropic(
+        api_key=api_key,
+        # Build the transport with the SDK's own client class (and its httpx
+        # Limits type) so it always matches the HTTP library the SDK uses
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            http2=True,
+            limits=type(anthropic.DEFAULT_CONNECTION_LIMITS)(
+                max_keepalive_connections=20, max_connections=40
+            ),
+            timeout=60
+        ),
+        # Retries are handled by ClaudeAgent so they can honor the rate limiter
+        max_retries=0
+    )
+
+
+class TokenBucket:
+    """Async limiter for requests and tokens per minute (0 disables a limit)"""
+    
+    def __init__(self, rpm: int, tpm: int):
+        if rpm < 0 or tpm < 0:
+            raise ValueError(f"Rate limits must not be negative (rpm={rpm}, tpm={tpm})")
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and the given number of tokens are available"""
+        check_requests = self.rpm > 0
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                if (not check_requests or self._requests >= 1) and self._tokens >= tokens:
+                    if check_requests:
+                        self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self._requests) * 60 / self.rpm if check_requests else 0,
+                    (tokens - self._tokens) * 60 / self.tpm if tokens else 0
+                ))
+
+
+@functools.lru_cache(maxsize=4)
+def _get_rate_limiter(api_key: str, loop: asyncio.AbstractEventLoop) -> TokenBucket:
+    """Return the shared rate limiter for an API key and event loop
+    
+    The bucket's lock is bound to a loop, so each loop gets its own. Limits come from CLAUDE_RPM and CLAUDE_TPM (requests/tokens per minute).
+    """
+    return TokenBucket(
+        rpm=int(os.environ.get('CLAUDE_RPM', 50)),
+        tpm=int(os.environ.get('CLAUDE_TPM', 50000))
+    )
+
+
+class CircuitBreaker:
+    """Stops calling the API after repeated provider failures
+    
+    Closed: calls go through. After `threshold` consecutive failures the
+    breaker opens and calls are short-circuited for `cooldown` seconds. Once
+    the cooldown has passed it is half-open: one trial call is let through,
+    and its outcome either closes the breaker or re-opens it.
+    """
+    
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open = False
+    
+    def is_open(self) -> bool:
+        """Return True if calls should be short-circuited"""
+        if self.opened_at is None:
+            return False
+        if self.half_open or time.monotonic() - self.opened_at < self.cooldown:
+            return True
+        # Cooldown elapsed: allow a single trial call
+        self.half_open = True
+        return False
+    
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.half_open = False
+    
+    def release_trial(self) -> None:
+        """End a half-open trial that gave no verdict on the API's health
+        
+        Used when the trial call was cancelled or failed for a reason unrelated
+        to the provider; the next call after the cooldown becomes a new trial.
+        """
+        self.half_open = False
+    
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.half_open or self.failures >= self.threshold:
+            if self.opened_at is None or self.half_open:
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.half_open = False
+
+
+def _error_type(e: Exception) -> Optional[str]:
+    """Return the API error type (e.g. 'overloaded_error') from an error body"""
+    body = getattr(e, 'body', None)
+    if isinstance(body, dict) and isinstance(body.get('error'), dict):
+        return body['error'].get('type')
+    return None
+
+
+def is_provider_failure(e: Exception) -> bool:
+    """Return True for errors that indicate the API itself is unavailable
+    
+    Classified by error type as well as status, since errors raised inside a
+    stream carry the stream's 200 status.
+    """
+    import anthropic
+    
+    if isinstance(e, anthropic.APIConnectionError):
+        return True
+    if isinstance(e, anthropic.APIStatusError):
+        return (e.status_code >= 500 or e.status_code in PROVIDER_FAILURE_STATUS_CODES
+                or _error_type(e) in RETRYABLE_ERROR_TYPES)
+    return False
+
+
+def is_retryable(e: Exception) -> bool:
+    """Return True for errors worth retrying with backoff"""
+    return is_provider_failure(e) or getattr(e, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+# Shared across agents so a batch stops calling a failing provider.
+# Tuned via CLAUDE_BREAKER_THRESHOLD (failures) and CLAUDE_BREAKER_COOLDOWN (seconds).
+_circuit_breaker = CircuitBreaker(
+    threshold=int(os.environ.get('CLAUDE_BREAKER_THRESHOLD', 5)),
+    cooldown=float(os.environ.get('CLAUDE_BREAKER_COOLDOWN', 60))
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _load_yaml(path_str: str, mtime: float) -> Any:
+    """Parse a YAML file, memoized by path and modification time"""
+    import yaml
+    
+    # Prefer the libyaml C parser when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path_str, 'rb') as f:
+        return yaml.load(f, Loader=loader)
+
+
+def load_yaml(path: Path) -> Any:
+    """Load a YAML file, re-parsing only when it has changed on disk"""
+    return _load_yaml(str(path), path.stat().st_mtime)
+
+
+def usage_counts(usage: Any = None) -> Dict[str, int]:
+    """Return token counts from an API usage object (all zero if None)
+    
+    Prompt tokens served from or written to the prompt cache are reported
+    separately from input_tokens, so all three are needed for the total.
+    """
+    return {
+        "input_tokens": getattr(usage, 'input_tokens', 0),
+        "cache_creation_input_tokens": getattr(usage, 'cache_creation_input_tokens', None) or 0,
+        "cache_read_input_tokens": getattr(usage, 'cache_read_input_tokens', None) or 0,
+        "output_tokens": getattr(usage, 'output_tokens', 0),
+    }
+
+
+def write_json(path: Union[str, Path], data: Dict[str, Any]) -> None:
+    """Atomically write data as indented JSON, creating parent directories as needed"""
+    output_file = Path(path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output_file.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop used by the synchronous wrappers
+    
+    Sync callers share one long-lived loop, rather than a fresh asyncio.run
+    each time, so the per-loop connection pool survives between calls. The
+    loop is closed at interpreter exit.
+    """
+    loop = asyncio.new_event_loop()
+    atexit.register(loop.close)
+    return loop
+
 
 class ClaudeAgent:
     """Executes Claude agent tasks using the Anthropic API"""
     
-    def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, use_cache: bool = True,
+                 cache_dir: Optional[str] = None, cache_ttl: int = DEFAULT_CACHE_TTL):
+        self.api_key = api_key
+        self.circuit_breaker = _circuit_breaker
         self.base_path = Path(__file__).parent.parent
+        self.use_cache = use_cache
+        self.cache_dir = Path(cache_dir) if cache_dir else self.base_path / 'cache'
+        self.cache_ttl = cache_ttl
+        self._spec_index = self._index_specs()
+        self._specs = self._load_spec_bundle()
+    
+    @property
+    def client(self) -> 'AsyncAnthropic':
+        """Anthropic client for the running event loop"""
+        return _get_client(self.api_key, asyncio.get_running_loop())
+    
+    @property
+    def rate_limiter(self) -> TokenBucket:
+        """Rate limiter for the running event loop"""
+        return _get_rate_limiter(self.api_key, asyncio.get_running_loop())
+    
+    def _cache_key(self, request: Dict[str, Any]) -> str:
+        """Hash the API request parameters into a cache key"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response if present and within TTL"""
+        cache_file = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - cache_file.stat().st_mtime > self.cache_ttl:
+                return None
+            return orjson.loads(cache_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+    
+    def _cache_put(self, key: str, data: Dict[str, Any],
+                   cache_dir: Optional[Path] = None) -> None:
+        """Atomically write a response to the cache (default: self.cache_dir)"""
+        cache_dir = cache_dir or self.cache_dir
+        try:
+            write_json(cache_dir / f"{key}.json", data)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache: {e}")
+        
+    async def _stream_message(self, request: Dict[str, Any], estimated_tokens: int,
+                              stream_output: bool = False) -> Tuple[str, Any]:
+        """Stream a message, retrying transient API errors with backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            await self.rate_limiter.acquire(estimated_tokens)
+            chunks = []
+            try:
+                async with self.client.messages.stream(**request) as stream:
+                    async for text in stream.text_stream:
+                        chunks.append(text)
+                        if stream_output:
+                            sys.stdout.write(text)
+                            sys.stdout.flush()
+                    message = await stream.get_final_message()
+                return "".join(chunks), message
+            except Exception as e:
+                # Don't retry once output has been emitted, it would be duplicated
+                if not is_retryable(e) or attempt == MAX_RETRIES or chunks:
+                    raise
+                backoff = 2 ** attempt
+                response = getattr(e, 'response', None)
+                try:
+                    retry_after = float(response.headers.get('retry-after', backoff)) if response is not None else backoff
+                except ValueError:
+                    retry_after = backoff
+                delay = max(retry_after, backoff) + random.random() * 0.1
+                logger.warning(f"API call failed ({e}), retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{MAX_RETRIES})")
+                await asyncio.sleep(delay)
+    
+    async def _count_input_tokens(self, request: Dict[str, Any]) -> int:
+        """Count prompt tokens for a request the API rejected without usage data"""
+        import anthropic
         
+        try:
+            count = await self.client.messages.count_tokens(
+                model=request['model'],
+                system=request['system'],
+                messages=request['messages']
+            )
+            return count.input_tokens
+        except anthropic.APIError as e:
+            logger.error(f"Failed to count tokens, recording 0 input tokens: {e}")
+            return 0
+    
+    def _index_specs(self) -> Dict[str, Path]:
+        """Map lowercase spec file stems to paths with a single directory scan"""
+        index = {}
+        try:
+            with os.scandir(self.base_path / 'agents' / 'specs') as entries:
+                for entry in entries:
+                    if entry.name.endswith('.yaml'):
+                        index[entry.name[:-len('.yaml')].lower()] = Path(entry.path)
+        except FileNotFoundError:
+            logger.warning("Agent specs directory not found")
+        return dict(sorted(index.items()))
+    
+    def _load_spec_bundle(self) -> Dict[str, Any]:
+        """Load precompiled specs, ignoring a missing or stale bundle"""
+        try:
+            import msgpack
+        except ImportError:
+            return {}
+        bundle = self.base_path / SPECS_BUNDLE
+        try:
+            bundle_mtime = bundle.stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        if any(path.stat().st_mtime > bundle_mtime for path in self._spec_index.values()):
+            logger.warning(f"{SPECS_BUNDLE} is older than the YAML specs, run compile_specs.py")
+            return {}
+        return msgpack.unpackb(bundle.read_bytes(), raw=False, strict_map_key=False)
+    
     def load_agent_spec(self, agent_id: str) -> Dict[str, Any]:
-        """Load agent specification from YAML file"""
-        spec_files = list(self.base_path.glob(f"agents/specs/{agent_id.lower()}*.yaml"))
-        if not spec_files:
+        """Load agent specification from the compiled bundle or YAML file"""
+        key = agent_id.lower()
+        # Spec files are named <agent-id>-<name>.yaml, so match on prefix
+        if key not in self._spec_index:
+            key = next((stem for stem in self._spec_index if stem.startswith(key)), None)
+        if key is None:
             raise FileNotFoundError(f"No specification found for agent {agent_id}")
         
-        with open(spec_files[0], 'r') as f:
-            return yaml.safe_load(f)
+        spec = self._specs.get(key)
+        if spec is None:
+            spec = load_yaml(self._spec_index[key])
+        return spec
     
     def load_context(self, context_path: str) -> Dict[str, Any]:
         """Load context configuration"""
@@ -49,8 +439,7 @@ class ClaudeAgent:
             logger.warning(f"Context file not found: {context_path}")
             return {}
             
-        with open(full_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(full_path)
     
     def load_task(self, task_path: str) -> Dict[str, Any]:
         """Load task configuration"""
@@ -62,104 +451,190 @@ class ClaudeAgent:
             logger.warning(f"Task file not found: {task_path}")
             return {}
             
-        with open(full_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml(full_path)
     
-    def build_prompt(self, agent_spec: Dict[str, Any], context: Dict[str, Any], 
-                     task: Dict[str, Any]) -> str:
-        """Build the prompt for Claude based on agent spec, context, and task"""
+    def build_prompt(self, agent_spec: Dict[str, Any], context: Dict[str, Any],
+                     task: Dict[str, Any]) -> Tuple[str, str]:
+        """Build the prompt for Claude based on agent spec, context, and task
+        
+        Returns a (prefix, suffix) pair. The prefix depends only on the agent
+        spec (identity, capabilities, restrictions, quality gates) and is
+        byte-identical across runs of the same agent: everything in it is
+        derived from agent_spec['metadata'] and agent_spec['spec']. The suffix
+        carries the per-run context and task. The prefix is marked for Anthropic
+        prompt caching only when it reaches the model's minimum cacheable length
+        (see min_cacheable_tokens); the bundled specs produce prefixes of ~100
+        tokens, well below it, so for them no caching takes place.
+        """
         agent_name = agent_spec['metadata']['name']
         agent_id = agent_spec['metadata']['id']
+        spec = agent_spec['spec']
+        dumps = json.dumps
         
-        prompt_parts = [
-            f"You are {agent_name} (Agent ID: {agent_id}).",
-            "",
-            "## Agent Capabilities:",
-        ]
+        prefix = io.StringIO()
+        w = prefix.write
+        w(f"You are {agent_name} (Agent ID: {agent_id}).\n\n## Agent Capabilities:")
         
         # Add capabilities
-        if 'capabilities' in agent_spec['spec']:
-            perms = agent_spec['spec']['capabilities'].get('permissions', [])
-            prompt_parts.extend([f"- {perm}" for perm in perms])
+        capabilities = spec.get('capabilities')
+        if capabilities is not None:
+            for perm in capabilities.get('permissions', []):
+                w(f"\n- {perm}")
         
-        prompt_parts.extend(["", "## Agent Restrictions:"])
-        if 'capabilities' in agent_spec['spec']:
-            restrictions = agent_spec['spec']['capabilities'].get('restrictions', [])
-            prompt_parts.extend([f"- {restriction}" for restriction in restrictions])
+        w("\n\n## Agent Restrictions:")
+        if capabilities is not None:
+            for restriction in capabilities.get('restrictions', []):
+                w(f"\n- {restriction}")
         
         # Add quality gates if present
-        if 'quality_gates' in agent_spec['spec']:
-            prompt_parts.extend(["", "## Quality Standards:"])
-            gates = agent_spec['spec']['quality_gates']
+        if 'quality_gates' in spec:
+            w("\n\n## Quality Standards:")
+            gates = spec['quality_gates']
             if 'thresholds' in gates:
-                prompt_parts.append(f"- Test Coverage: {gates['thresholds'].get('test_coverage', {}).get('lines', 85)}%")
-                prompt_parts.append(f"- Max Complexity: {gates['thresholds'].get('complexity', {}).get('cyclomatic', 10)}")
+                w(f"\n- Test Coverage: {gates['thresholds'].get('test_coverage', {}).get('lines', 85)}%")
+                w(f"\n- Max Complexity: {gates['thresholds'].get('complexity', {}).get('cyclomatic', 10)}")
+        
+        suffix = io.StringIO()
+        w = suffix.write
         
         # Add context
         if context:
-            prompt_parts.extend(["", "## Context:", json.dumps(context, indent=2)])
+            w("## Context:\n")
+            w(dumps(context, indent=2))
+            w("\n\n")
         
         # Add task requirements
         if task:
-            prompt_parts.extend(["", "## Task:"])
+            w("## Task:\n")
             if 'spec' in task and 'requirements' in task['spec']:
-                prompt_parts.append(task['spec']['requirements'])
+                w(task['spec']['requirements'])
             else:
-                prompt_parts.append(json.dumps(task, indent=2))
+                w(dumps(task, indent=2))
+            w("\n\n")
         
-        prompt_parts.extend([
-            "",
-            "Please analyze and execute this task according to your capabilities and restrictions.",
-            "Provide a detailed response including any issues found, recommendations, and actions taken."
-        ])
+        w("Please analyze and execute this task according to your capabilities and restrictions.\n"
+          "Provide a detailed response including any issues found, recommendations, and actions taken.")
         
-        return "\n".join(prompt_parts)
+        return prefix.getvalue(), suffix.getvalue()
     
     def execute(self, agent_id: str, context_path: Optional[str] = None,
                 task_path: Optional[str] = None, output_path: Optional[str] = None,
-                metrics_path: Optional[str] = None) -> Dict[str, Any]:
-        """Execute the agent task"""
-        logger.info(f"Executing agent {agent_id}")
+                metrics_path: Optional[str] = None, model: Optional[str] = None,
+                max_tokens: Optional[int] = None, stream_output: bool = False) -> Dict[str, Any]:
+        """Execute the agent task (synchronous wrapper around aexecute)
+        
+        Must not be called from a running event loop; await aexecute there.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("execute() cannot be called from a running event loop, await aexecute() instead")
+        return _get_loop().run_until_complete(self.aexecute(
+            agent_id=agent_id,
+            context_path=context_path,
+            task_path=task_path,
+            output_path=output_path,
+            metrics_path=metrics_path,
+            model=model,
+            max_tokens=max_tokens,
+            stream_output=stream_output
+        ))
+    
+    async def execute_many(self, jobs: List[Dict[str, Any]], max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           output_jsonl: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Execute several agent tasks concurrently
         
-        # Load configurations
-        agent_spec = self.load_agent_spec(agent_id)
-        context = self.load_context(context_path) if context_path else {}
-        task = self.load_task(task_path) if task_path else {}
+        Each job is a dict of keyword arguments for aexecute. At most
+        max_concurrency requests are in flight at once. A job that raises is
+        reported as a failed result rather than aborting the run. With output_jsonl,
+        each result is written to that file as a JSON line as soon as its
+        job completes, and only the SUMMARY_FIELDS of each result are returned.
+        """
+        sem = asyncio.Semaphore(max_concurrency)
+        jsonl_file = None
+        if output_jsonl:
+            Path(output_jsonl).parent.mkdir(parents=True, exist_ok=True)
+            jsonl_file = open(output_jsonl, 'w', buffering=1)
         
-        # Build prompt
-        prompt = self.build_prompt(agent_spec, context, task)
+        async def run(job: Dict[str, Any]) -> Dict[str, Any]:
+            async with sem:
+                start_time = datetime.now()
+                try:
+                    result = await self.aexecute(**job)
+                except Exception as e:
+                    # e.g. an unknown agent id or a malformed spec; report it
+                    # as this job's failure instead of aborting the others
+                    logger.error(f"Error executing agent {job.get('agent_id')}: {e}")
+                    result = self._build_result(
+                        job.get('agent_id'), {"metadata": None}, start_time,
+                        (datetime.now() - start_time).total_seconds(), False, str(e),
+                        f"Error: {str(e)}", job.get('context_path'), job.get('task_path')
+                    )
+            if jsonl_file is not None:
+                jsonl_file.write(orjson.dumps(result).decode() + "\n")
+                jsonl_file.flush()
+                # The full result is on disk; keep only a summary in memory
+                return {k: result[k] for k in SUMMARY_FIELDS}
+            return result
         
-        # Execute with Claude
-        start_time = datetime.now()
         try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4000,
-                temperature=0,
-                system="You are a specialized agent in the GIS Platform development workflow. Analyze the provided context and execute the requested task according to your specifications.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-            
-            response_text = message.content[0].text
-            success = True
-            error = None
-            
-        except Exception as e:
-            logger.error(f"Error executing agent: {e}")
-            response_text = f"Error: {str(e)}"
-            success = False
-            error = str(e)
+            return await asyncio.gather(*(run(job) for job in jobs))
+        finally:
+            if jsonl_file is not None:
+                jsonl_file.close()
+                logger.info(f"Results streamed to {output_jsonl}")
+    
+    async def _prepare_request(self, agent_id: str, context_path: Optional[str],
+                               task_path: Optional[str], model: Optional[str],
+                               max_tokens: Optional[int]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Load the agent's inputs and build its Messages API request
         
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        Returns (agent_spec, request).
+        """
+        # Load configurations concurrently; the loaders are independent
+        agent_spec, context, task = await asyncio.gather(
+            asyncio.to_thread(self.load_agent_spec, agent_id),
+            asyncio.to_thread(self.load_context, context_path),
+            asyncio.to_thread(self.load_task, task_path)
+        )
         
-        # Prepare result
-        result = {
+        # Build prompt
+        prompt_prefix, prompt_suffix = self.build_prompt(agent_spec, context, task)
+        
+        model = model or agent_spec['spec'].get('model', DEFAULT_MODEL)
+        prefix_block = {"type": "text", "text": prompt_prefix}
+        # Shorter prefixes are silently not cached, so only mark long ones.
+        # The breakpoint covers the system prompt too, which precedes it.
+        if (len(SYSTEM_PROMPT) + len(prompt_prefix)) // 4 >= min_cacheable_tokens(model):
+            prefix_block["cache_control"] = {"type": "ephemeral"}
+        
+        request = {
+            "model": model,
+            "max_tokens": max_tokens or agent_spec['spec'].get('max_tokens', DEFAULT_MAX_TOKENS),
+            "temperature": 0,
+            "system": SYSTEM_PROMPT,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        prefix_block,
+                        {
+                            "type": "text",
+                            "text": prompt_suffix
+                        }
+                    ]
+                }
+            ]
+        }
+        return agent_spec, request
+    
+    def _build_result(self, agent_id: str, agent_spec: Dict[str, Any], start_time: datetime,
+                      duration: float, success: bool, error: Optional[str], response_text: str,
+                      context_path: Optional[str], task_path: Optional[str]) -> Dict[str, Any]:
+        """Assemble the result dict written to --output"""
+        return {
             "agent_id": agent_id,
             "timestamp": start_time.isoformat(),
             "duration_seconds": duration,
@@ -172,33 +647,211 @@ class ClaudeAgent:
                 "task_file": task_path
             }
         }
-        
+    
+    def _save_result(self, result: Dict[str, Any], output_path: Optional[str],
+                     metrics_path: Optional[str], usage: Dict[str, int]) -> None:
+        """Write the result and its metrics (with token usage) to the requested paths"""
         # Save output
         if output_path:
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_file, 'w') as f:
-                json.dump(result, f, indent=2)
+            write_json(output_path, result)
             logger.info(f"Results saved to {output_path}")
         
         # Save metrics
         if metrics_path:
-            metrics = {
-                "agent_id": agent_id,
-                "timestamp": start_time.isoformat(),
-                "duration_seconds": duration,
-                "success": success,
-                "tokens_used": len(prompt.split()) + len(response_text.split()),  # Rough estimate
+            metrics = {k: result[k] for k in ('agent_id', 'timestamp', 'duration_seconds', 'success')} | usage | {
+                "tokens_used": sum(usage.values()),
             }
-            metrics_file = Path(metrics_path)
-            metrics_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(metrics_file, 'w') as f:
-                json.dump(metrics, f, indent=2)
+            write_json(metrics_path, metrics)
             logger.info(f"Metrics saved to {metrics_path}")
+    
+    async def submit_batch(self, jobs: List[Dict[str, Any]]) -> str:
+        """Submit agent tasks through the Message Batches API
+        
+        Each job is a dict of keyword arguments for aexecute (stream_output is
+        ignored). Batches are processed asynchronously at reduced cost; the
+        job list is recorded in .claude/batches/<batch_id>.json so poll_batch
+        can write each job's output and metrics once the batch has ended. The
+        agent's cache settings are recorded too, so results are cached (or
+        not) as requested at submit time.
+        """
+        prepared = await asyncio.gather(*(
+            self._prepare_request(
+                job['agent_id'], job.get('context_path'), job.get('task_path'),
+                job.get('model'), job.get('max_tokens')
+            )
+            for job in jobs
+        ))
+        
+        batch = await self.client.messages.batches.create(requests=[
+            {"custom_id": f"job-{i}", "params": request}
+            for i, (_, request) in enumerate(prepared)
+        ])
+        
+        manifest = {
+            "batch_id": batch.id,
+            "submitted_at": datetime.now().isoformat(),
+            # Cache settings at submit time, applied when results are fetched
+            "use_cache": self.use_cache,
+            "cache_dir": str(self.cache_dir.resolve()),
+            "jobs": {
+                f"job-{i}": {
+                    "agent_id": job['agent_id'],
+                    "context_path": job.get('context_path'),
+                    "task_path": job.get('task_path'),
+                    "output_path": job.get('output_path'),
+                    "metrics_path": job.get('metrics_path'),
+                    "agent_metadata": agent_spec['metadata'],
+                    "cache_key": self._cache_key(request)
+                }
+                for i, (job, (agent_spec, request)) in enumerate(zip(jobs, prepared))
+            }
+        }
+        write_json(self.base_path / BATCHES_DIR / f"{batch.id}.json", manifest)
+        logger.info(f"Submitted batch {batch.id} with {len(jobs)} jobs")
+        return batch.id
+    
+    async def poll_batch(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the results of a submitted batch
+        
+        Returns None while the batch is still processing. Once it has ended,
+        writes each job's output and metrics files using the same schema as
+        aexecute and returns the results in submission order.
+        """
+        manifest_path = self.base_path / BATCHES_DIR / f"{batch_id}.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(
+                f"No manifest for batch {batch_id} at {manifest_path}; "
+                "fetch results from the checkout that submitted it"
+            )
+        
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != 'ended':
+            logger.info(f"Batch {batch_id} is {batch.processing_status}")
+            return None
+        
+        manifest = orjson.loads(manifest_path.read_bytes())
+        start_time = datetime.fromisoformat(manifest['submitted_at'])
+        duration = (batch.ended_at - batch.created_at).total_seconds()
+        
+        results = {}
+        async for entry in await self.client.messages.batches.results(batch_id):
+            job = manifest['jobs'][entry.custom_id]
+            usage = usage_counts()
+            if entry.result.type == 'succeeded':
+                message = entry.result.message
+                response_text = "".join(block.text for block in message.content if block.type == 'text')
+                usage = usage_counts(message.usage)
+                success = True
+                error = None
+                if manifest['use_cache']:
+                    self._cache_put(job['cache_key'], {"response": response_text},
+                                    cache_dir=Path(manifest['cache_dir']))
+            else:
+                if entry.result.type == 'errored':
+                    error = entry.result.error.error.message
+                else:
+                    error = entry.result.type
+                response_text = f"Error: {error}"
+                success = False
+            
+            result = self._build_result(
+                job['agent_id'], {"metadata": job['agent_metadata']}, start_time, duration,
+                success, error, response_text, job['context_path'], job['task_path']
+            )
+            self._save_result(result, job['output_path'], job['metrics_path'], usage)
+            results[entry.custom_id] = result
+        
+        return [results[custom_id] for custom_id in manifest['jobs'] if custom_id in results]
+    
+    async def aexecute(self, agent_id: str, context_path: Optional[str] = None,
+                       task_path: Optional[str] = None, output_path: Optional[str] = None,
+                       metrics_path: Optional[str] = None, model: Optional[str] = None,
+                       max_tokens: Optional[int] = None, stream_output: bool = False) -> Dict[str, Any]:
+        """Execute the agent task
+        
+        model and max_tokens override the agent spec's spec.model and
+        spec.max_tokens, which in turn default to DEFAULT_MODEL and
+        DEFAULT_MAX_TOKENS. With stream_output, response text is written to
+        stdout as it arrives.
+        """
+        logger.info(f"Executing agent {agent_id}")
+        
+        agent_spec, request = await self._prepare_request(
+            agent_id, context_path, task_path, model, max_tokens
+        )
+        cache_key = self._cache_key(request)
+        cached = self._cache_get(cache_key) if self.use_cache else None
+        
+        # Execute with Claude
+        start_time = datetime.now()
+        usage = usage_counts()
+        if cached is not None:
+            logger.info(f"Using cached response for agent {agent_id}")
+            response_text = cached['response']
+            if stream_output:
+                sys.stdout.write(response_text)
+                sys.stdout.flush()
+            success = True
+            error = None
+        elif self.circuit_breaker.is_open():
+            logger.error(f"Circuit breaker open, skipping API call for agent {agent_id}")
+            response_text = "Error: circuit_open"
+            success = False
+            error = "circuit_open"
+        else:
+            try:
+                # Rough estimate (~4 chars per token) for the rate limiter
+                estimated_tokens = sum(
+                    len(block['text']) for block in request['messages'][0]['content']
+                ) // 4 + request['max_tokens']
+                response_text, message = await self._stream_message(
+                    request, estimated_tokens, stream_output=stream_output
+                )
+                self.circuit_breaker.record_success()
+                usage = usage_counts(message.usage)
+                success = True
+                error = None
+                if self.use_cache:
+                    self._cache_put(cache_key, {"response": response_text})
+                
+            except asyncio.CancelledError:
+                self.circuit_breaker.release_trial()
+                raise
+            except Exception as e:
+                if is_provider_failure(e):
+                    self.circuit_breaker.record_failure()
+                else:
+                    # Not evidence the API is healthy, so don't reset the count
+                    self.circuit_breaker.release_trial()
+                logger.error(f"Error executing agent: {e}")
+                response_text = f"Error: {str(e)}"
+                success = False
+                error = str(e)
+                # Only count when the API rejected the request itself; after a
+                # provider failure, another call would just add load
+                if metrics_path and not is_provider_failure(e):
+                    usage['input_tokens'] = await self._count_input_tokens(request)
+        
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        
+        result = self._build_result(
+            agent_id, agent_spec, start_time, duration, success, error, response_text,
+            context_path, task_path
+        )
+        self._save_result(result, output_path, metrics_path, usage)
         
         return result
 
 
+def print_summary(results: List[Dict[str, Any]]) -> bool:
+    """Print one status line per result, returning True if all succeeded"""
+    for result in results:
+        status = "✅" if result['success'] else "❌"
+        print(f"{status} {result['agent_id']}: {result['error'] or 'ok'}")
+    return all(result['success'] for result in results)
+
+
 def main():
     """Main entry point for the Claude agent executor"""
     parser = argparse.ArgumentParser(description='Execute Claude agents')
@@ -210,11 +863,29 @@ def main():
     
     # Execute command
     execute_parser = agent_subparsers.add_parser('execute', help='Execute an agent')
-    execute_parser.add_argument('agent_id', help='Agent ID to execute (e.g., QRA-001)')
+    execute_parser.add_argument('agent_id', nargs='+', help='Agent ID(s) to execute (e.g., QRA-001)')
     execute_parser.add_argument('--context', help='Path to context YAML file')
     execute_parser.add_argument('--task', help='Path to task YAML file')
     execute_parser.add_argument('--output', help='Path to save output JSON')
     execute_parser.add_argument('--metrics', help='Path to save metrics JSON')
+    execute_parser.add_argument('--output-jsonl', help='Write each result to this JSON Lines file as it completes')
+    execute_parser.add_argument('--max-concurrency', type=int,
+                                help=f'Maximum concurrent API calls when running several agents '
+                                     f'(default: {DEFAULT_MAX_CONCURRENCY})')
+    execute_parser.add_argument('--model', help=f'Claude model to use (default: spec value or {DEFAULT_MODEL})')
+    execute_parser.add_argument('--max-tokens', type=int,
+                                help=f'Maximum tokens to generate (default: spec value or {DEFAULT_MAX_TOKENS})')
+    execute_parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache')
+    execute_parser.add_argument('--cache-dir', help='Directory for cached responses (default: .claude/cache)')
+    execute_parser.add_argument('--cache-ttl', type=int, default=DEFAULT_CACHE_TTL,
+                                help='Seconds a cached response stays valid')
+    execute_parser.add_argument('--batch', action='store_true',
+                                help='Submit through the Message Batches API and print the batch ID')
+    
+    # Batch results command
+    results_parser = agent_subparsers.add_parser('batch-results', help='Fetch results of a submitted batch')
+    results_parser.add_argument('batch_id', help='Batch ID printed by execute --batch')
+    results_parser.add_argument('--wait', action='store_true', help='Poll until the batch has ended')
     
     args = parser.parse_args()
     
@@ -230,20 +901,85 @@ def main():
     
     # Execute command
     if args.command == 'agent' and args.agent_command == 'execute':
+        if len(args.agent_id) > 1 and (args.output or args.metrics):
+            parser.error("--output and --metrics take a single agent; use --output-jsonl for several")
+        if len(args.agent_id) > 1 and not args.batch and not args.output_jsonl:
+            parser.error("--output-jsonl is required when executing several agents")
+        if args.batch and (args.output_jsonl or args.max_concurrency is not None):
+            parser.error("--output-jsonl and --max-concurrency do not apply to --batch")
+        jobs = [
+            {
+                "agent_id": agent_id,
+                "context_path": args.context,
+                "task_path": args.task,
+                "output_path": args.output,
+                "metrics_path": args.metrics,
+                "model": args.model,
+                "max_tokens": args.max_tokens
+            }
+            for agent_id in args.agent_id
+        ]
+    
+    if args.command == 'agent' and args.agent_command == 'execute' and args.batch:
+        agent = ClaudeAgent(
+            api_key,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            cache_ttl=args.cache_ttl
+        )
+        batch_id = asyncio.run(agent.submit_batch(jobs))
+        print(f"📦 Submitted batch {batch_id}")
+        print(f"   Fetch results with: claude agent batch-results {batch_id} --wait")
+    elif args.command == 'agent' and args.agent_command == 'execute' and (
+            len(jobs) > 1 or args.output_jsonl):
+        agent = ClaudeAgent(
+            api_key,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            cache_ttl=args.cache_ttl
+        )
+        results = asyncio.run(agent.execute_many(
+            jobs,
+            max_concurrency=args.max_concurrency or DEFAULT_MAX_CONCURRENCY,
+            output_jsonl=args.output_jsonl
+        ))
+        if not print_summary(results):
+            sys.exit(1)
+    elif args.command == 'agent' and args.agent_command == 'batch-results':
         agent = ClaudeAgent(api_key)
-        result = agent.execute(
-            agent_id=args.agent_id,
-            context_path=args.context,
-            task_path=args.task,
-            output_path=args.output,
-            metrics_path=args.metrics
+        
+        async def poll():
+            while True:
+                results = await agent.poll_batch(args.batch_id)
+                if results is not None or not args.wait:
+                    return results
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+        
+        try:
+            results = asyncio.run(poll())
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        if results is None:
+            print(f"⏳ Batch {args.batch_id} is still processing")
+            sys.exit(2)
+        if not print_summary(results):
+            sys.exit(1)
+    elif args.command == 'agent' and args.agent_command == 'execute':
+        agent = ClaudeAgent(
+            api_key,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            cache_ttl=args.cache_ttl
         )
+        print("Response:", flush=True)
+        result = asyncio.run(agent.aexecute(**jobs[0], stream_output=True))
+        print()
         
         if result['success']:
-            print(f"✅ Agent {args.agent_id} executed successfully")
-            print(f"\nResponse:\n{result['response']}")
+            print(f"\n✅ Agent {result['agent_id']} executed successfully")
         else:
-            print(f"❌ Agent {args.agent_id} execution failed: {result['error']}")
+            print(f"❌ Agent {result['agent_id']} execution failed: {result['error']}")
             sys.exit(1)
     else:
         parser.print_help()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Agent Spec Compiler - Bundles agent specifications for fast loading
+Parses .claude/agents/specs/*.yaml once and writes them to a single msgpack
+file keyed by lowercase spec file name, which claude_agent.py loads instead
+of parsing YAML on every run
+"""
+import sys
+import argparse
+import logging
+from pathlib import Path
+import msgpack
+
+# Add the scripts directory to Python path
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from claude_agent import SPECS_BUNDLE, load_yaml
+
+logger = logging.getLogger('compile_specs')
+
+BASE_PATH = script_dir.parent
+
+
+def compile_specs(specs_dir: Path, output_path: Path) -> int:
+    """Compile every spec in specs_dir into output_path, returning the count"""
+    specs = {}
+    for spec_file in sorted(specs_dir.glob('*.yaml')):
+        specs[spec_file.stem.lower()] = load_yaml(spec_file)
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(msgpack.packb(specs, use_bin_type=True))
+    return len(specs)
+
+
+def main():
+    """Main entry point for the spec compiler"""
+    parser = argparse.ArgumentParser(description='Compile agent specs to msgpack')
+    parser.add_argument('--specs-dir', default=str(BASE_PATH / 'agents' / 'specs'),
+                        help='Directory containing agent spec YAML files')
+    parser.add_argument('--output', default=str(BASE_PATH / SPECS_BUNDLE),
+                        help='Path to write the compiled bundle')
+    args = parser.parse_args()
+    
+    specs_dir = Path(args.specs_dir)
+    if not specs_dir.is_dir():
+        logger.error(f"Specs directory not found: {specs_dir}")
+        sys.exit(1)
+    
+    count = compile_specs(specs_dir, Path(args.output))
+    logger.info(f"Compiled {count} agent specs to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
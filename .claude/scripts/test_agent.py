@@ -62,7 +62,8 @@ spec:
         print("\n📝 Executing test task...")
         result = agent.execute(
             agent_id="QRA-001",
-            task_path=task_file
+            task_path=task_file,
+            max_tokens=64
         )
         
         if result['success']:
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the on-disk response cache in claude_agent.py
+Run with: python .claude/scripts/test_cache.py
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the scripts directory to Python path
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from claude_agent import ClaudeAgent
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+        self.agent = ClaudeAgent('test-key', cache_dir=tmp.name, cache_ttl=60)
+
+    def test_put_then_get(self):
+        self.agent._cache_put('abc', {"response": "cached"})
+        self.assertEqual(self.agent._cache_get('abc'), {"response": "cached"})
+
+    def test_missing_entry(self):
+        self.assertIsNone(self.agent._cache_get('missing'))
+
+    def test_expired_entry_is_ignored(self):
+        self.agent._cache_put('abc', {"response": "old"})
+        stale = time.time() - 61
+        os.utime(self.cache_dir / 'abc.json', (stale, stale))
+        self.assertIsNone(self.agent._cache_get('abc'))
+
+    def test_corrupt_entry_is_ignored(self):
+        (self.cache_dir / 'abc.json').write_text('{not json')
+        self.assertIsNone(self.agent._cache_get('abc'))
+
+    def test_failed_write_keeps_previous_entry(self):
+        self.agent._cache_put('abc', {"response": "first"})
+        with mock.patch('claude_agent.os.replace', side_effect=OSError("disk full")):
+            self.agent._cache_put('abc', {"response": "second"})
+        self.assertEqual(self.agent._cache_get('abc'), {"response": "first"})
+        self.assertEqual([p.name for p in self.cache_dir.iterdir()], ['abc.json'])
+
+    def test_key_covers_request_parameters(self):
+        request = {"model": "a", "max_tokens": 10, "temperature": 0, "system": "s", "messages": []}
+        key = self.agent._cache_key(request)
+        self.assertEqual(key, self.agent._cache_key(dict(reversed(list(request.items())))))
+        for field, value in (("model", "b"), ("max_tokens", 11), ("temperature", 1), ("system", "t")):
+            self.assertNotEqual(key, self.agent._cache_key(request | {field: value}))
+
+
+class CachedExecuteTest(unittest.TestCase):
+    """aexecute serves cache hits without an API call unless caching is disabled"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        self.calls = 0
+
+        async def fake_stream_message(agent, request, estimated_tokens, stream_output=False):
+            self.calls += 1
+            usage = SimpleNamespace(input_tokens=1, output_tokens=1)
+            return "fresh", SimpleNamespace(usage=usage)
+
+        patcher = mock.patch.object(ClaudeAgent, '_stream_message', fake_stream_message)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def execute(self, use_cache):
+        agent = ClaudeAgent('test-key', use_cache=use_cache, cache_dir=self.cache_dir)
+        return asyncio.run(agent.aexecute('QRA-001'))['response']
+
+    def test_second_run_is_served_from_cache(self):
+        self.assertEqual(self.execute(use_cache=True), "fresh")
+        self.assertEqual(self.execute(use_cache=True), "fresh")
+        self.assertEqual(self.calls, 1)
+
+    def test_no_cache_bypasses_reads_and_writes(self):
+        self.execute(use_cache=False)
+        self.assertEqual(list(Path(self.cache_dir).iterdir()), [])
+        self.execute(use_cache=True)
+        self.execute(use_cache=False)
+        self.assertEqual(self.calls, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
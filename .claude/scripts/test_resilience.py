@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the circuit breaker, rate limiter and retry logic in claude_agent.py
+Run with: python .claude/scripts/test_resilience.py
+"""
+import sys
+import asyncio
+import importlib.util
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to Python path
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+import claude_agent
+from claude_agent import MAX_RETRIES, CircuitBreaker, ClaudeAgent, TokenBucket
+
+HAS_ANTHROPIC = importlib.util.find_spec('anthropic') is not None
+
+
+class FakeClock:
+    """Stands in for time.monotonic so tests control elapsed time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('claude_agent.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(threshold=3, cooldown=60)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_stays_closed_below_threshold(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open())
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open())
+
+    def test_opens_at_threshold_until_cooldown(self):
+        self.trip()
+        self.assertTrue(self.breaker.is_open())
+        self.clock.now += 59
+        self.assertTrue(self.breaker.is_open())
+
+    def test_half_open_allows_single_trial(self):
+        self.trip()
+        self.clock.now += 60
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.is_open())
+
+    def test_trial_success_closes(self):
+        self.trip()
+        self.clock.now += 60
+        self.breaker.is_open()
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.is_open())
+        self.assertFalse(self.breaker.is_open())
+
+    def test_trial_failure_reopens(self):
+        self.trip()
+        self.clock.now += 60
+        self.breaker.is_open()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open())
+        self.clock.now += 60
+        self.assertFalse(self.breaker.is_open())
+
+    def test_released_trial_allows_new_trial(self):
+        self.trip()
+        self.clock.now += 60
+        self.breaker.is_open()
+        self.breaker.release_trial()
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.is_open())
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('claude_agent.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_acquire(self, bucket, tokens):
+        """Acquire from the bucket, returning the total time spent sleeping"""
+        slept = []
+
+        async def fake_sleep(delay):
+            slept.append(delay)
+            self.clock.now += delay
+
+        with mock.patch('claude_agent.asyncio.sleep', fake_sleep):
+            asyncio.run(bucket.acquire(tokens))
+        return sum(slept)
+
+    def test_acquire_within_budget_does_not_wait(self):
+        bucket = TokenBucket(rpm=2, tpm=100)
+        self.assertEqual(self.run_acquire(bucket, 50), 0)
+        self.assertEqual(self.run_acquire(bucket, 50), 0)
+
+    def test_waits_for_request_refill(self):
+        bucket = TokenBucket(rpm=2, tpm=1000)
+        self.run_acquire(bucket, 0)
+        self.run_acquire(bucket, 0)
+        self.assertAlmostEqual(self.run_acquire(bucket, 0), 30)
+
+    def test_waits_for_token_refill(self):
+        bucket = TokenBucket(rpm=100, tpm=600)
+        self.run_acquire(bucket, 600)
+        self.assertAlmostEqual(self.run_acquire(bucket, 60), 6)
+
+    def test_oversized_request_is_capped_at_capacity(self):
+        bucket = TokenBucket(rpm=10, tpm=100)
+        self.assertEqual(self.run_acquire(bucket, 500), 0)
+
+    def test_zero_disables_limits(self):
+        bucket = TokenBucket(rpm=0, tpm=0)
+        for _ in range(5):
+            self.assertEqual(self.run_acquire(bucket, 1000), 0)
+
+    def test_zero_rpm_still_limits_tokens(self):
+        bucket = TokenBucket(rpm=0, tpm=600)
+        self.run_acquire(bucket, 600)
+        self.assertAlmostEqual(self.run_acquire(bucket, 60), 6)
+
+    def test_negative_limits_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rpm=-1, tpm=100)
+
+
+def api_error(status, error_type, headers=None):
+    """Build an APIStatusError as the SDK raises it for a response or SSE error event"""
+    import anthropic
+    import httpx
+
+    response = httpx.Response(
+        status, headers=headers or {},
+        request=httpx.Request('POST', 'https://api.anthropic.com/v1/messages')
+    )
+    body = {"type": "error", "error": {"type": error_type, "message": error_type}}
+    return anthropic.APIStatusError(str(body), response=response, body=body)
+
+
+class FakeStream:
+    """Async context manager mimicking client.messages.stream()"""
+
+    def __init__(self, chunks=(), error=None, error_on_enter=False):
+        self.chunks = chunks
+        self.error = error
+        self.error_on_enter = error_on_enter
+
+    async def __aenter__(self):
+        if self.error and self.error_on_enter:
+            raise self.error
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise self.error
+
+    async def get_final_message(self):
+        return "final-message"
+
+
+class NoLimit:
+    async def acquire(self, tokens=0):
+        pass
+
+
+if HAS_ANTHROPIC:
+    from anthropic import APIStatusError
+
+
+@unittest.skipUnless(HAS_ANTHROPIC, 'anthropic not installed')
+class StreamRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.streams = []
+        self.sleeps = []
+        self.agent = ClaudeAgent('test-key')
+
+        fake_client = mock.Mock()
+        fake_client.messages.stream.side_effect = lambda **request: self.streams.pop(0)
+        self.fake_client = fake_client
+
+        async def fake_sleep(delay):
+            self.sleeps.append(delay)
+
+        for patcher in (
+            mock.patch.object(ClaudeAgent, 'client', property(lambda agent: fake_client)),
+            mock.patch.object(ClaudeAgent, 'rate_limiter', property(lambda agent: NoLimit())),
+            mock.patch('claude_agent.asyncio.sleep', fake_sleep),
+            mock.patch('claude_agent.random.random', lambda: 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream(self):
+        return asyncio.run(self.agent._stream_message({}, 0))
+
+    def test_success_returns_text_and_message(self):
+        self.streams = [FakeStream(chunks=["Test ", "successful"])]
+        self.assertEqual(self.stream(), ("Test successful", "final-message"))
+
+    def test_in_stream_overload_is_retried(self):
+        self.streams = [
+            FakeStream(error=api_error(200, 'overloaded_error')),
+            FakeStream(chunks=["ok"]),
+        ]
+        self.assertEqual(self.stream()[0], "ok")
+        self.assertEqual(self.sleeps, [1])
+
+    def test_retry_after_is_honored(self):
+        self.streams = [
+            FakeStream(error=api_error(429, 'rate_limit_error', {'retry-after': '7'}), error_on_enter=True),
+            FakeStream(chunks=["ok"]),
+        ]
+        self.stream()
+        self.assertEqual(self.sleeps, [7])
+
+    def test_non_numeric_retry_after_falls_back_to_backoff(self):
+        self.streams = [
+            FakeStream(error=api_error(429, 'rate_limit_error', {'retry-after': 'soon'}), error_on_enter=True),
+            FakeStream(error=api_error(529, 'overloaded_error'), error_on_enter=True),
+            FakeStream(chunks=["ok"]),
+        ]
+        self.stream()
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_bad_request_is_not_retried(self):
+        self.streams = [FakeStream(error=api_error(400, 'invalid_request_error'), error_on_enter=True)]
+        with self.assertRaises(APIStatusError):
+            self.stream()
+        self.assertEqual(self.fake_client.messages.stream.call_count, 1)
+
+    def test_no_retry_after_chunks_emitted(self):
+        self.streams = [FakeStream(chunks=["partial"], error=api_error(200, 'overloaded_error'))]
+        with self.assertRaises(APIStatusError):
+            self.stream()
+        self.assertEqual(self.fake_client.messages.stream.call_count, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_raises_after_max_retries(self):
+        self.streams = [
+            FakeStream(error=api_error(529, 'overloaded_error'), error_on_enter=True)
+            for _ in range(MAX_RETRIES + 1)
+        ]
+        with self.assertRaises(APIStatusError):
+            self.stream()
+        self.assertEqual(self.fake_client.messages.stream.call_count, MAX_RETRIES + 1)
+        self.assertEqual(len(self.sleeps), MAX_RETRIES)
+
+
+@unittest.skipUnless(HAS_ANTHROPIC, 'anthropic not installed')
+class ErrorClassificationTest(unittest.TestCase):
+    def test_in_stream_overload_is_provider_failure(self):
+        self.assertTrue(claude_agent.is_provider_failure(api_error(200, 'overloaded_error')))
+
+    def test_conflict_is_retryable_but_not_provider_failure(self):
+        error = api_error(409, 'conflict_error')
+        self.assertTrue(claude_agent.is_retryable(error))
+        self.assertFalse(claude_agent.is_provider_failure(error))
+
+    def test_bad_request_is_neither(self):
+        error = api_error(400, 'invalid_request_error')
+        self.assertFalse(claude_agent.is_retryable(error))
+        self.assertFalse(claude_agent.is_provider_failure(error))
+
+
+if __name__ == '__main__':
+    unittest.main()
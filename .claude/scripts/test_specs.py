@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for agent spec loading and the precompiled spec bundle
+Run with: python .claude/scripts/test_specs.py
+"""
+import os
+import sys
+import tempfile
+import importlib.util
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the scripts directory to Python path
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+import claude_agent
+from claude_agent import SPECS_BUNDLE, ClaudeAgent
+
+HAS_MSGPACK = importlib.util.find_spec('msgpack') is not None
+
+
+@unittest.skipUnless(HAS_MSGPACK, 'msgpack not installed')
+class SpecBundleTest(unittest.TestCase):
+    def setUp(self):
+        from compile_specs import compile_specs
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base_path = Path(tmp.name) / '.claude'
+        self.specs_dir = base_path / 'agents' / 'specs'
+        self.specs_dir.mkdir(parents=True)
+        self.spec_file = self.specs_dir / 'tst-001-example.yaml'
+        self.spec_file.write_text('metadata:\n  id: TST-001\n  name: Compiled\n')
+        self.bundle = base_path / SPECS_BUNDLE
+        compile_specs(self.specs_dir, self.bundle)
+
+        # ClaudeAgent resolves .claude/ relative to the module file
+        patcher = mock.patch.object(claude_agent, '__file__', str(base_path / 'scripts' / 'claude_agent.py'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def touch(self, path, offset):
+        mtime = self.bundle.stat().st_mtime + offset
+        os.utime(path, (mtime, mtime))
+
+    def test_current_bundle_is_used(self):
+        self.spec_file.write_text('metadata:\n  id: TST-001\n  name: Edited\n')
+        self.touch(self.spec_file, -10)
+        spec = ClaudeAgent('test-key').load_agent_spec('TST-001')
+        self.assertEqual(spec['metadata']['name'], 'Compiled')
+
+    def test_stale_bundle_falls_back_to_yaml(self):
+        self.spec_file.write_text('metadata:\n  id: TST-001\n  name: Edited\n')
+        self.touch(self.spec_file, 10)
+        with self.assertLogs('claude_agent', level='WARNING'):
+            spec = ClaudeAgent('test-key').load_agent_spec('TST-001')
+        self.assertEqual(spec['metadata']['name'], 'Edited')
+
+    def test_missing_bundle_falls_back_to_yaml(self):
+        self.bundle.unlink()
+        spec = ClaudeAgent('test-key').load_agent_spec('tst-001')
+        self.assertEqual(spec['metadata']['name'], 'Compiled')
+
+
+if __name__ == '__main__':
+    unittest.main()